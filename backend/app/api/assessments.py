@@ -7,13 +7,49 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
+import json
+import logging
 
 from app.services.database import get_db
-from app.services.gemma_service import GemmaService
+from app.services.gemma_service import GemmaService, get_gemma_service
 from app.models.database import Assessment, Patient
 from sqlalchemy import select
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Severity bands as (minimum overall score, level), checked from the top down
+_SEVERITY_THRESHOLDS = (
+    (8.0, "normal"),
+    (6.0, "mild"),
+    (4.0, "moderate"),
+)
+
+_RECOMMENDATIONS = (
+    "تمارين الذاكرة اليومية",
+    "أنشطة التحفيز المعرفي",
+    "التفاعل الاجتماعي المنتظم",
+    "متابعة طبية دورية",
+    "استخدام التذكيرات البصرية",
+)
+
+# Fallback domain scores, used when Gemma's reply has no usable JSON block
+_DEFAULT_SCORES = {
+    "memory_short_term": 7.5,
+    "memory_long_term": 6.8,
+    "orientation": 8.2,
+    "language": 7.9,
+    "attention": 6.5,
+    "executive": 7.1,
+    "motor_skills": 8.0,
+    "mood": 7.3,
+    "overall": 7.4
+}
+
+# Placeholders are not valid JSON, so a template copied verbatim never parses as real scores
+_SCORES_JSON_TEMPLATE = "{" + ", ".join(f'"{key}": <1-10>' for key in _DEFAULT_SCORES) + "}"
+
+_JSON_DECODER = json.JSONDecoder()
 
 class AssessmentRequest(BaseModel):
     patient_id: int
@@ -25,6 +61,7 @@ class AssessmentResponse(BaseModel):
     patient_id: int
     assessment_type: str
     scores: Dict[str, Any]
+    scores_source: Optional[str] = None  # model, default; None for older records
     severity_level: str
     recommendations: List[str]
     timestamp: datetime
@@ -49,7 +86,7 @@ async def create_assessment(
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Generate assessment using Gemma service
-    gemma_service = GemmaService()
+    gemma_service = get_gemma_service()
     assessment_data = await _generate_assessment(
         gemma_service, 
         request.assessment_type, 
@@ -76,6 +113,7 @@ async def create_assessment(
         patient_id=assessment.patient_id,
         assessment_type=assessment.assessment_type,
         scores=assessment.scores,
+        scores_source=assessment_data["raw_data"]["scores_source"],
         severity_level=assessment.severity_level,
         recommendations=assessment.recommendations,
         timestamp=assessment.timestamp
@@ -105,6 +143,8 @@ async def get_patient_assessments(
             "id": assessment.id,
             "assessment_type": assessment.assessment_type,
             "scores": assessment.scores,
+            # Lets clients tell fallback scores from ones Gemma produced
+            "scores_source": (assessment.raw_data or {}).get("scores_source"),
             "severity_level": assessment.severity_level,
             "recommendations": assessment.recommendations,
             "timestamp": assessment.timestamp
@@ -134,7 +174,7 @@ async def interactive_assessment(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    gemma_service = GemmaService()
+    gemma_service = get_gemma_service()
     
     # Analyze response using Gemma
     analysis_prompt = f"""
@@ -152,14 +192,18 @@ async def interactive_assessment(
     5. اقتراحات للتحسين
     
     أعط تقييماً باللغة العربية مع درجة من 1-10.
+    
+    في آخر الرد اكتب الدرجة بصيغة JSON فقط: {{"score": <1-10>}}
+    واكتب مكان <1-10> رقم من 1 إلى 10.
     """
     
-    analysis = await gemma_service.generate_text(analysis_prompt)
+    analysis = await gemma_service.generate_text(analysis_prompt, use_cache=True)
     
     return {
         "task_type": task_type,
         "user_response": user_response,
         "analysis": analysis,
+        "score": _parse_task_score(analysis),
         "next_task": _get_next_task(task_type),
         "timestamp": datetime.now()
     }
@@ -184,51 +228,32 @@ async def _generate_assessment(gemma_service: GemmaService, assessment_type: str
     6. الوظائف التنفيذية
     7. المهارات الحركية
     8. الحالة المزاجية
+    9. التقييم العام (overall)
     
     أعط تقييماً شاملاً مع توصيات علاجية باللغة العربية.
+    
+    في آخر الرد اكتب الدرجات بصيغة JSON فقط بالمفاتيح التالية،
+    وكل قيمة لازم تكون رقم من 1 إلى 10 مكان <1-10>:
+    {_SCORES_JSON_TEMPLATE}
     """
     
     assessment_text = await gemma_service.generate_text(assessment_prompt)
+    scores = _parse_assessment_scores(assessment_text)
+    scores_source = "model"
+    if scores is None:
+        logger.warning("No usable scores in Gemma's assessment reply; using default scores")
+        scores = dict(_DEFAULT_SCORES)
+        scores_source = "default"
     
-    # Parse assessment (simplified for demo)
-    scores = {
-        "memory_short_term": 7.5,
-        "memory_long_term": 6.8,
-        "orientation": 8.2,
-        "language": 7.9,
-        "attention": 6.5,
-        "executive": 7.1,
-        "motor_skills": 8.0,
-        "mood": 7.3,
-        "overall": 7.4
-    }
-    
-    # Determine severity level
-    overall_score = scores["overall"]
-    if overall_score >= 8.0:
-        severity_level = "normal"
-    elif overall_score >= 6.0:
-        severity_level = "mild"
-    elif overall_score >= 4.0:
-        severity_level = "moderate"
-    else:
-        severity_level = "severe"
-    
-    recommendations = [
-        "تمارين الذاكرة اليومية",
-        "أنشطة التحفيز المعرفي",
-        "التفاعل الاجتماعي المنتظم",
-        "متابعة طبية دورية",
-        "استخدام التذكيرات البصرية"
-    ]
+    severity_level = _determine_severity(scores["overall"])
     
     return {
         "scores": scores,
         "severity_level": severity_level,
-        "recommendations": recommendations,
+        "recommendations": list(_RECOMMENDATIONS),
         "raw_data": {
             "assessment_text": assessment_text,
-            "assessment_type": assessment_type,
+            "scores_source": scores_source,
             "patient_info": {
                 "name": patient.name,
                 "age": patient.age,
@@ -237,48 +262,107 @@ async def _generate_assessment(gemma_service: GemmaService, assessment_type: str
         }
     }
 
+def _parse_assessment_scores(assessment_text: str) -> Optional[Dict[str, float]]:
+    """Read domain scores from the JSON block at the end of Gemma's reply"""
+    
+    parsed = _extract_json_object(assessment_text, "overall")
+    if parsed is None:
+        return None
+    
+    scores = {}
+    for key in _DEFAULT_SCORES:
+        value = _valid_score(parsed.get(key))
+        # All-or-nothing: a partial set would mix real and placeholder scores
+        if value is None:
+            return None
+        scores[key] = value
+    
+    return scores
+
+def _parse_task_score(analysis: str) -> Optional[float]:
+    """Read the 1-10 task score from the JSON block at the end of Gemma's reply"""
+    
+    parsed = _extract_json_object(analysis, "score")
+    if parsed is None:
+        return None
+    return _valid_score(parsed.get("score"))
+
+def _extract_json_object(text: str, key: str) -> Optional[Dict[str, Any]]:
+    """Return the last JSON object in a model reply that has the given key"""
+    
+    # Scan back from the last brace so braces earlier in the prose are ignored;
+    # requiring the key skips objects nested inside the one we want
+    start = text.rfind("{")
+    while start != -1:
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict) and key in parsed:
+            return parsed
+        start = text.rfind("{", 0, start)
+    
+    return None
+
+def _valid_score(value: Any) -> Optional[float]:
+    """Accept only numeric scores on the 1-10 scale"""
+    
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 1 <= value <= 10:
+        return None
+    return float(value)
+
+def _determine_severity(overall_score: float) -> str:
+    """Map an overall score onto a severity level"""
+    
+    for threshold, level in _SEVERITY_THRESHOLDS:
+        if overall_score >= threshold:
+            return level
+    return "severe"
+
+# Cognitive tasks per assessment type, built once at import
+_COGNITIVE_TASKS = {
+    "memory": (
+        CognitiveTask(
+            task_type="word_recall",
+            question="احفظ هذه الكلمات الثلاث: تفاحة، سيارة، كتاب. سأسألك عنها بعد قليل.",
+            scoring_criteria={"max_score": 3, "time_limit": 300}
+        ),
+        CognitiveTask(
+            task_type="story_recall",
+            question="احكيلي عن ذكرى جميلة من طفولتك.",
+            scoring_criteria={"coherence": 5, "detail": 5}
+        )
+    ),
+    "attention": (
+        CognitiveTask(
+            task_type="digit_span",
+            question="اسمع الأرقام دي وأعيدها: 3-7-2-9",
+            scoring_criteria={"max_digits": 7, "accuracy": True}
+        ),
+    ),
+    "language": (
+        CognitiveTask(
+            task_type="naming",
+            question="إيه اسم الحاجة دي؟ (صورة قلم)",
+            scoring_criteria={"accuracy": True, "fluency": 5}
+        ),
+    )
+}
+
+# Task -> next task in the interactive assessment sequence
+_NEXT_TASK = {
+    "word_recall": "story_recall",
+    "story_recall": "digit_span",
+    "digit_span": "naming",
+    "naming": None
+}
+
 def _get_cognitive_tasks(assessment_type: str) -> List[CognitiveTask]:
     """Get cognitive tasks for assessment type"""
     
-    tasks_map = {
-        "memory": [
-            CognitiveTask(
-                task_type="word_recall",
-                question="احفظ هذه الكلمات الثلاث: تفاحة، سيارة، كتاب. سأسألك عنها بعد قليل.",
-                scoring_criteria={"max_score": 3, "time_limit": 300}
-            ),
-            CognitiveTask(
-                task_type="story_recall",
-                question="احكيلي عن ذكرى جميلة من طفولتك.",
-                scoring_criteria={"coherence": 5, "detail": 5}
-            )
-        ],
-        "attention": [
-            CognitiveTask(
-                task_type="digit_span",
-                question="اسمع الأرقام دي وأعيدها: 3-7-2-9",
-                scoring_criteria={"max_digits": 7, "accuracy": True}
-            )
-        ],
-        "language": [
-            CognitiveTask(
-                task_type="naming",
-                question="إيه اسم الحاجة دي؟ (صورة قلم)",
-                scoring_criteria={"accuracy": True, "fluency": 5}
-            )
-        ]
-    }
-    
-    return tasks_map.get(assessment_type, [])
+    return list(_COGNITIVE_TASKS.get(assessment_type, ()))
 
 def _get_next_task(current_task: str) -> Optional[str]:
     """Get next task in assessment sequence"""
     
-    task_sequence = {
-        "word_recall": "story_recall",
-        "story_recall": "digit_span",
-        "digit_span": "naming",
-        "naming": None
-    }
-    
-    return task_sequence.get(current_task)
+    return _NEXT_TASK.get(current_task)
@@ -6,11 +6,12 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from pydantic import BaseModel
+import asyncio
 import uuid
 from datetime import datetime
 
 from app.services.database import get_db
-from app.services.gemma_service import GemmaService
+from app.services.gemma_service import get_gemma_service
 from app.models.database import Conversation, Patient
 from sqlalchemy import select
 
@@ -52,7 +53,7 @@ async def create_text_conversation(
     session_id = request.session_id or str(uuid.uuid4())
     
     # Get AI response using Gemma service
-    gemma_service = GemmaService()
+    gemma_service = get_gemma_service()
     ai_response = await gemma_service.generate_text(
         prompt=request.content,
         system_prompt=f"المريض: {patient.name}, العمر: {patient.age}, المرحلة: {patient.diagnosis_stage}"
@@ -97,14 +98,13 @@ async def create_multimodal_conversation(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    gemma_service = GemmaService()
+    gemma_service = get_gemma_service()
     session_id = request.session_id or str(uuid.uuid4())
     
     # Process based on available modalities
     if image and audio:
         # Full multimodal processing
-        image_data = await image.read()
-        audio_data = await audio.read()
+        image_data, audio_data = await asyncio.gather(image.read(), audio.read())
         
         # Analyze image first
         image_response = await gemma_service.analyze_image_with_text(
@@ -14,6 +14,12 @@ from sqlalchemy import select, and_
 
 router = APIRouter()
 
+# Fixed-length recurrence patterns; "monthly" varies in length and is handled separately
+_RECURRENCE_INTERVALS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
 class ReminderCreate(BaseModel):
     patient_id: int
     title: str
@@ -268,11 +274,11 @@ async def delete_reminder(
 def _calculate_next_occurrence(current_time: datetime, pattern: str) -> Optional[datetime]:
     """Calculate next occurrence for recurring reminders"""
     
-    if pattern == "daily":
-        return current_time + timedelta(days=1)
-    elif pattern == "weekly":
-        return current_time + timedelta(weeks=1)
-    elif pattern == "monthly":
+    interval = _RECURRENCE_INTERVALS.get(pattern)
+    if interval:
+        return current_time + interval
+    
+    if pattern == "monthly":
         # Simple monthly calculation (same day next month)
         if current_time.month == 12:
             return current_time.replace(year=current_time.year + 1, month=1)
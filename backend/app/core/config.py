@@ -37,6 +37,8 @@ class Settings(BaseSettings):
     GEMMA_MODEL: str = "gemma-3-27b-it"
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.7
+    GEMMA_CACHE_SIZE: int = 256  # Cached analysis responses
+    GEMMA_MAX_CONCURRENCY: int = 4  # Simultaneous Gemma API calls
     
     # Audio Settings
     MAX_AUDIO_SIZE_MB: int = 10
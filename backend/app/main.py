@@ -5,6 +5,7 @@ FastAPI application with Gemma 3n integration
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
 import uvicorn
 import os
@@ -12,7 +13,7 @@ from contextlib import asynccontextmanager
 
 from app.api import conversations, patients, assessments, reminders
 from app.core.config import settings
-from app.services.gemma_service import GemmaService
+from app.services.gemma_service import get_gemma_service
 from app.services.database import init_db
 
 # Initialize security
@@ -37,7 +38,8 @@ app = FastAPI(
     title="Faker - Alzheimer's Memory Assistant API",
     description="Evidence-based AI assistant for Arabic-speaking Alzheimer's patients",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -68,7 +70,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
-    gemma_service = GemmaService()
+    gemma_service = get_gemma_service()
     
     return {
         "status": "healthy",
@@ -37,7 +37,7 @@ class Conversation(Base):
     __tablename__ = "conversations"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     session_id = Column(String(100), index=True)
     content = Column(Text, nullable=False)
     response = Column(Text)
@@ -74,7 +74,7 @@ class Assessment(Base):
     __tablename__ = "assessments"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
     assessment_type = Column(String(50), nullable=False)  # memory, attention, language, executive
     scores = Column(JSON)  # Detailed scores for different cognitive domains
     severity_level = Column(String(20))  # normal, mild, moderate, severe
@@ -95,7 +95,7 @@ class Reminder(Base):
     title = Column(String(200), nullable=False)
     description = Column(Text)
     reminder_type = Column(String(50))  # medication, appointment, activity, social
-    scheduled_time = Column(DateTime(timezone=True), nullable=False)
+    scheduled_time = Column(DateTime(timezone=True), nullable=False, index=True)
     is_recurring = Column(Boolean, default=False)
     recurrence_pattern = Column(String(100))  # daily, weekly, monthly
     is_completed = Column(Boolean, default=False)
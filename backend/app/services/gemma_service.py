@@ -3,20 +3,88 @@ Gemma 3n Service - Multimodal AI integration for Alzheimer's care
 """
 
 import google.generativeai as genai
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 import base64
+import hashlib
 import io
-from PIL import Image
+import random
 import asyncio
 import logging
+from collections import OrderedDict
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_ALZHEIMER_SYSTEM_PROMPT = """أنت 'فاكر' - مساعد ذكي متخصص في رعاية مرضى الزهايمر باللغة العربية المصرية.
+
+🏥 خبرتك الطبية:
+- متخصص في التعامل مع فقدان الذاكرة والخرف
+- تفهم مراحل مرض الزهايمر وأعراضه
+- تستخدم تقنيات العلاج بالذكريات والمحادثة
+- تراقب الحالة المزاجية والمعرفية للمريض
+
+🗣️ أسلوب المحادثة:
+- استخدم العربية المصرية البسيطة
+- تكلم بصوت دافئ وصبور
+- اطرح سؤال واحد في المرة
+- اثني على أي تذكر صحيح
+- لا تصحح الأخطاء بقسوة
+- استخدم الأسماء والتفاصيل المألوفة
+
+📊 التقييم المعرفي:
+- راقب قدرة التذكر (قصير/طويل المدى)
+- لاحظ التوجه الزمني والمكاني
+- اقيم مهارات اللغة والتواصل
+- انتبه للتغيرات المزاجية
+
+هدفك: مساعدة المريض يحس بالأمان والحب والاهتمام."""
+
+def _compose_system_prompt(system_prompt: Optional[str] = None) -> str:
+    """Append per-patient instructions to the base system prompt"""
+    
+    if system_prompt:
+        return f"{_ALZHEIMER_SYSTEM_PROMPT}\n\nتعليمات إضافية: {system_prompt}"
+    return _ALZHEIMER_SYSTEM_PROMPT
+
+_MOCK_FALLBACK_REPLIES = (
+    "أهلاً وسهلاً! إزيك النهاردة؟",
+    "مرحباً حبيبي، عامل إيه؟",
+    "ده جميل أوي! فاكر حاجات تانية كده؟",
+    "برافو عليك! ذاكرتك كويسة جداً.",
+    "مش مشكلة لو مش فاكر، خد وقتك براحتك.",
+    "تعالي نتكلم عن حاجة حلوة تانية.",
+    "إنت كويس النهاردة، الحمد لله.",
+    "عايز نشوف صور حد من العيلة؟",
+    "قولي، إيه أحلى ذكرياتك؟",
+    "خلاص، متقلقش، أنا معاك.",
+)
+
+# Mock replies as (trigger words, reply), in priority order
+_MOCK_REPLY_RULES = (
+    (("مرحب", "أهل", "سلام"), "أهلاً وسهلاً بيك! نورت المكان."),
+    (("إزيك", "عامل", "أخبار"), "أنا كويس الحمد لله، وإنت عامل إيه؟"),
+    (("فاكر", "ذكر", "تذكر"), "طبعاً فاكر! حكيلي أكتر عن ده."),
+    (("مش فاكر", "نسيت", "مش متذكر"), "مش مشكلة خالص، ده طبيعي. خد وقتك."),
+)
+
+# Caps in-flight Gemma calls across all requests; created lazily on the running loop
+_gemma_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_gemma_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide Gemma concurrency limiter"""
+    global _gemma_semaphore
+    if _gemma_semaphore is None:
+        _gemma_semaphore = asyncio.Semaphore(settings.GEMMA_MAX_CONCURRENCY)
+    return _gemma_semaphore
+
 class GemmaService:
     """Service for interacting with Google Gemma 3n multimodal API"""
     
+    # Shared across instances: (model, prompt digest, temperature, max tokens) -> response
+    _response_cache: "OrderedDict[Tuple[str, bytes, float, int], str]" = OrderedDict()
+    
     def __init__(self):
         """Initialize Gemma service"""
         if settings.GOOGLE_API_KEY:
@@ -43,9 +111,15 @@ class GemmaService:
         prompt: str,
         system_prompt: Optional[str] = None,
         temperature: float = settings.TEMPERATURE,
-        max_tokens: int = settings.MAX_TOKENS
+        max_tokens: int = settings.MAX_TOKENS,
+        use_cache: bool = False
     ) -> str:
-        """Generate text response from Gemma 3n"""
+        """Generate text response from Gemma 3n
+        
+        With use_cache, identical prompts are answered from an in-process LRU
+        instead of a new model call. Only use it for analysis prompts, not for
+        conversational replies that should vary.
+        """
         
         if not self.model:
             return self._get_mock_response(prompt)
@@ -54,15 +128,24 @@ class GemmaService:
             # Prepare the full prompt with system instructions
             full_prompt = self._build_alzheimer_prompt(prompt, system_prompt)
             
-            # Generate response
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens,
+            cache_key = None
+            if use_cache:
+                # Key on a digest so cached entries don't pin the full prompt text
+                cache_key = (
+                    settings.GEMMA_MODEL,
+                    hashlib.blake2b(full_prompt.encode(), digest_size=16).digest(),
+                    temperature,
+                    max_tokens
                 )
-            )
+                if cache_key in self._response_cache:
+                    self._response_cache.move_to_end(cache_key)
+                    return self._response_cache[cache_key]
+            
+            # Generate response
+            response = await self._generate_content(full_prompt, temperature, max_tokens)
+            
+            if cache_key is not None:
+                self._cache_response(cache_key, response.text)
             
             return response.text
             
@@ -82,6 +165,9 @@ class GemmaService:
             return self._get_mock_image_response(text_prompt)
         
         try:
+            # Pillow is only needed on the image path, so import it here
+            from PIL import Image
+            
             # Convert image data to PIL Image
             image = Image.open(io.BytesIO(image_data))
             
@@ -89,13 +175,10 @@ class GemmaService:
             full_prompt = self._build_image_analysis_prompt(text_prompt, patient_context)
             
             # Generate response with image
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            response = await self._generate_content(
                 [full_prompt, image],
-                generation_config=genai.types.GenerationConfig(
-                    temperature=settings.TEMPERATURE,
-                    max_output_tokens=settings.MAX_TOKENS,
-                )
+                settings.TEMPERATURE,
+                settings.MAX_TOKENS
             )
             
             return response.text
@@ -133,37 +216,31 @@ class GemmaService:
             logger.error(f"Error processing audio: {e}")
             return self._get_mock_audio_response(context)
     
+    async def _generate_content(self, contents: Any, temperature: float, max_tokens: int) -> Any:
+        """Run a blocking generate_content call off the event loop"""
+        
+        async with _get_gemma_semaphore():
+            return await asyncio.to_thread(
+                self.model.generate_content,
+                contents,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_tokens,
+                )
+            )
+    
+    def _cache_response(self, cache_key: Tuple[str, bytes, float, int], text: str) -> None:
+        """Store a response, evicting the least recently used entry when full"""
+        
+        self._response_cache[cache_key] = text
+        self._response_cache.move_to_end(cache_key)
+        while len(self._response_cache) > settings.GEMMA_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
     def _build_alzheimer_prompt(self, user_input: str, system_prompt: Optional[str] = None) -> str:
         """Build comprehensive prompt for Alzheimer's care"""
         
-        base_system = """أنت 'فاكر' - مساعد ذكي متخصص في رعاية مرضى الزهايمر باللغة العربية المصرية.
-
-🏥 خبرتك الطبية:
-- متخصص في التعامل مع فقدان الذاكرة والخرف
-- تفهم مراحل مرض الزهايمر وأعراضه
-- تستخدم تقنيات العلاج بالذكريات والمحادثة
-- تراقب الحالة المزاجية والمعرفية للمريض
-
-🗣️ أسلوب المحادثة:
-- استخدم العربية المصرية البسيطة
-- تكلم بصوت دافئ وصبور
-- اطرح سؤال واحد في المرة
-- اثني على أي تذكر صحيح
-- لا تصحح الأخطاء بقسوة
-- استخدم الأسماء والتفاصيل المألوفة
-
-📊 التقييم المعرفي:
-- راقب قدرة التذكر (قصير/طويل المدى)
-- لاحظ التوجه الزمني والمكاني
-- اقيم مهارات اللغة والتواصل
-- انتبه للتغيرات المزاجية
-
-هدفك: مساعدة المريض يحس بالأمان والحب والاهتمام."""
-
-        if system_prompt:
-            base_system += f"\n\nتعليمات إضافية: {system_prompt}"
-        
-        return f"{base_system}\n\nالمريض: {user_input}\nفاكر: "
+        return f"{_compose_system_prompt(system_prompt)}\n\nالمريض: {user_input}\nفاكر: "
     
     def _build_image_analysis_prompt(self, text_prompt: str, patient_context: Optional[Dict] = None) -> str:
         """Build prompt for image analysis"""
@@ -204,32 +281,13 @@ class GemmaService:
     def _get_mock_response(self, prompt: str) -> str:
         """Generate mock response for testing"""
         
-        arabic_responses = [
-            "أهلاً وسهلاً! إزيك النهاردة؟",
-            "مرحباً حبيبي، عامل إيه؟",
-            "ده جميل أوي! فاكر حاجات تانية كده؟",
-            "برافو عليك! ذاكرتك كويسة جداً.",
-            "مش مشكلة لو مش فاكر، خد وقتك براحتك.",
-            "تعالي نتكلم عن حاجة حلوة تانية.",
-            "إنت كويس النهاردة، الحمد لله.",
-            "عايز نشوف صور حد من العيلة؟",
-            "قولي، إيه أحلى ذكرياتك؟",
-            "خلاص، متقلقش، أنا معاك.",
-        ]
-        
-        # Context-aware responses
-        user_lower = prompt.lower()
-        if any(word in user_lower for word in ['مرحب', 'أهل', 'سلام']):
-            return "أهلاً وسهلاً بيك! نورت المكان."
-        elif any(word in user_lower for word in ['إزيك', 'عامل', 'أخبار']):
-            return "أنا كويس الحمد لله، وإنت عامل إيه؟"
-        elif any(word in user_lower for word in ['فاكر', 'ذكر', 'تذكر']):
-            return "طبعاً فاكر! حكيلي أكتر عن ده."
-        elif any(word in user_lower for word in ['مش فاكر', 'نسيت', 'مش متذكر']):
-            return "مش مشكلة خالص، ده طبيعي. خد وقتك."
-        else:
-            import random
-            return random.choice(arabic_responses)
+        prompt_lower = prompt.lower()
+        
+        # Context-aware responses: the earliest matching rule wins
+        for words, reply in _MOCK_REPLY_RULES:
+            if any(word in prompt_lower for word in words):
+                return reply
+        return random.choice(_MOCK_FALLBACK_REPLIES)
     
     def _get_mock_image_response(self, prompt: str) -> str:
         """Mock image analysis response"""
@@ -243,3 +301,8 @@ class GemmaService:
             "mood_indicators": ["calm", "clear"],
             "cognitive_markers": ["coherent_speech", "good_articulation"]
         }
+
+@lru_cache(maxsize=None)
+def get_gemma_service() -> GemmaService:
+    """Shared GemmaService, so the client is configured once per process"""
+    return GemmaService()
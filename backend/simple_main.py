@@ -6,7 +6,9 @@ Works with system Python packages to avoid environment issues
 import json
 import os
 import random
+from collections import deque
 from datetime import datetime
+from itertools import count, islice
 from typing import List, Optional
 
 try:
@@ -23,6 +25,7 @@ except ImportError:
     import uvicorn
 
 # Configuration
+MAX_STORED_CONVERSATIONS = 500  # Oldest conversations are dropped beyond this
 ALLOWED_ORIGINS = ["http://localhost:3000", "http://localhost:3001", "http://localhost:8081", "http://10.0.2.2:3000"]
 
 app = FastAPI(
@@ -70,7 +73,8 @@ class Reminder(BaseModel):
     is_completed: bool = False
 
 # In-memory storage
-conversations = []
+conversations = deque(maxlen=MAX_STORED_CONVERSATIONS)
+conversation_ids = count(1)
 patients = [
     {
         "id": 1,
@@ -80,6 +84,7 @@ patients = [
         "created_at": datetime.now().isoformat()
     }
 ]
+patients_by_id = {patient["id"]: patient for patient in patients}
 reminders = [
     {
         "id": 1,
@@ -123,22 +128,24 @@ arabic_responses = {
     ]
 }
 
+# Response categories as (trigger words, category), in priority order
+response_rules = (
+    (("مرحب", "أهل", "السلام"), "greetings"),
+    (("مش فاكر", "نسيت", "مش متذكر"), "memory_support"),
+    (("خايف", "قلقان", "حزين"), "emotional_support"),
+    (("فين", "أنهي مكان"), "orientation_help"),
+    (("عايز", "أكلم"), "family_connection"),
+)
+
 def get_smart_response(user_input: str) -> str:
     """Generate contextual Arabic response"""
     input_lower = user_input.lower()
     
-    if "مرحب" in input_lower or "أهل" in input_lower or "السلام" in input_lower:
-        return random.choice(arabic_responses["greetings"])
-    elif "مش فاكر" in input_lower or "نسيت" in input_lower or "مش متذكر" in input_lower:
-        return random.choice(arabic_responses["memory_support"])
-    elif "خايف" in input_lower or "قلقان" in input_lower or "حزين" in input_lower:
-        return random.choice(arabic_responses["emotional_support"])
-    elif "فين" in input_lower or "أنهي مكان" in input_lower:
-        return random.choice(arabic_responses["orientation_help"])
-    elif "عايز" in input_lower or "أكلم" in input_lower:
-        return random.choice(arabic_responses["family_connection"])
-    else:
-        return random.choice(arabic_responses["memory_support"])
+    # The earliest matching rule wins; default to memory support
+    for words, category in response_rules:
+        if any(word in input_lower for word in words):
+            return random.choice(arabic_responses[category])
+    return random.choice(arabic_responses["memory_support"])
 
 @app.get("/")
 async def root():
@@ -163,7 +170,7 @@ async def create_conversation(request: ConversationRequest):
     response_text = get_smart_response(request.content)
     
     conversation = {
-        "id": len(conversations) + 1,
+        "id": next(conversation_ids),
         "content": request.content,
         "response": response_text,
         "mood_score": random.uniform(0.6, 0.9),
@@ -176,11 +183,12 @@ async def create_conversation(request: ConversationRequest):
 
 @app.get("/api/v1/conversations")
 async def get_conversations(patient_id: int = 1, session_id: str = "default"):
-    return [ConversationResponse(**conv) for conv in conversations[-10:]]
+    recent = islice(conversations, max(len(conversations) - 10, 0), None)
+    return [ConversationResponse(**conv) for conv in recent]
 
 @app.get("/api/v1/patients/{patient_id}")
 async def get_patient(patient_id: int):
-    patient = next((p for p in patients if p["id"] == patient_id), None)
+    patient = patients_by_id.get(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return Patient(**patient)
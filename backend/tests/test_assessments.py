@@ -0,0 +1,111 @@
+"""
+Tests for parsing Gemma's cognitive assessment replies
+"""
+
+import json
+
+import pytest
+
+from app.api.assessments import (
+    _DEFAULT_SCORES,
+    _determine_severity,
+    _extract_json_object,
+    _parse_assessment_scores,
+    _parse_task_score,
+    _valid_score,
+)
+
+def _scores_reply(prose: str = "التقييم: الذاكرة كويسة.", **overrides) -> str:
+    """Build an assessment reply ending in a full scores block"""
+    
+    scores = {key: 7 for key in _DEFAULT_SCORES}
+    scores.update(overrides)
+    return f"{prose}\n{json.dumps(scores)}"
+
+def test_extract_ignores_braces_in_prose():
+    text = 'المريض قال {مش فاكر} ثم:\n{"score": 7}'
+    assert _extract_json_object(text, "score") == {"score": 7}
+
+def test_extract_allows_trailing_text():
+    text = '{"score": 6}\n```\nشكراً'
+    assert _extract_json_object(text, "score") == {"score": 6}
+
+def test_extract_returns_enclosing_object_with_key():
+    text = 'x {"score": 7, "d": {"a": 1}}'
+    assert _extract_json_object(text, "score") == {"score": 7, "d": {"a": 1}}
+
+def test_extract_prefers_last_matching_object():
+    text = 'مثال: {"score": 2} والنتيجة: {"score": 9}'
+    assert _extract_json_object(text, "score") == {"score": 9}
+
+@pytest.mark.parametrize("text", [
+    "لا يوجد JSON هنا",
+    '{"score": 7',
+    '{"other": 7}',
+    '{"d": {"a": 1}}',
+])
+def test_extract_returns_none_without_matching_object(text):
+    assert _extract_json_object(text, "score") is None
+
+@pytest.mark.parametrize("value, expected", [
+    (1, 1.0),
+    (10, 10.0),
+    (7.5, 7.5),
+    (0, None),
+    (11, None),
+    (-3, None),
+    (float("nan"), None),
+    (float("inf"), None),
+    (True, None),
+    ("7", None),
+    (None, None),
+])
+def test_valid_score(value, expected):
+    assert _valid_score(value) == expected
+
+def test_parse_scores_from_model_reply():
+    scores = _parse_assessment_scores(_scores_reply(overall=8.5))
+    assert scores == {**{key: 7.0 for key in _DEFAULT_SCORES}, "overall": 8.5}
+
+def test_parse_scores_ignores_prose_braces():
+    reply = _scores_reply(prose="ملاحظة {الذاكرة ضعيفة} اليوم")
+    assert _parse_assessment_scores(reply)["overall"] == 7.0
+
+@pytest.mark.parametrize("overrides", [
+    {"overall": 0},
+    {"mood": 11},
+    {"attention": True},
+    {"language": "7"},
+])
+def test_parse_scores_rejects_any_invalid_value(overrides):
+    assert _parse_assessment_scores(_scores_reply(**overrides)) is None
+
+def test_parse_scores_rejects_nan():
+    reply = _scores_reply().replace('"overall": 7', '"overall": NaN')
+    assert _parse_assessment_scores(reply) is None
+
+def test_parse_scores_rejects_missing_key():
+    scores = {key: 7 for key in _DEFAULT_SCORES if key != "mood"}
+    assert _parse_assessment_scores(json.dumps(scores)) is None
+
+def test_parse_scores_rejects_unfilled_template():
+    template = "{" + ", ".join(f'"{key}": <1-10>' for key in _DEFAULT_SCORES) + "}"
+    assert _parse_assessment_scores(template) is None
+
+def test_parse_task_score():
+    assert _parse_task_score('إجابة جيدة.\n{"score": 8}') == 8.0
+    assert _parse_task_score('{"score": 0}') is None
+    assert _parse_task_score("بدون درجة") is None
+
+@pytest.mark.parametrize("overall, level", [
+    (10, "normal"),
+    (8.0, "normal"),
+    (7.9, "mild"),
+    (6.0, "mild"),
+    (5.9, "moderate"),
+    (4.0, "moderate"),
+    (3.9, "severe"),
+    (1, "severe"),
+])
+def test_determine_severity(overall, level):
+    assert _determine_severity(overall) == level